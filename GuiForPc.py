@@ -17,7 +17,8 @@ import configparser
 import sys
 
 
-CONFIG_FILE = "spotify_converter.cfg"
+CONFIG_FILE = "spotify_converter.json"
+LEGACY_CONFIG_FILE = "spotify_converter.cfg"
 DEFAULT_CONFIG = {
     "Spotify": {"client_id": "", "client_secret": ""},
     "Settings": {
@@ -55,31 +56,33 @@ class SpotifyToYouTubeConverter(ctk.CTk):
         self.active_downloads: Dict[str, Any] = {}
         self.stop_requested = False
 
-    def load_config(self) -> configparser.ConfigParser:
+    def load_config(self) -> Dict[str, Dict[str, Any]]:
 
-        config = configparser.ConfigParser()
+        config: Dict[str, Dict[str, Any]] = {}
 
-        if not os.path.exists(CONFIG_FILE):
-            config.read_dict(DEFAULT_CONFIG)
+        if os.path.exists(CONFIG_FILE):
             try:
-                with open(CONFIG_FILE, "w") as configfile:
-                    config.write(configfile)
-            except Exception as e:
-                print(f"Error creating config file: {e}")
-        else:
-            try:
-                config.read(CONFIG_FILE)
+                with open(CONFIG_FILE, "r") as configfile:
+                    config = json.load(configfile)
             except Exception as e:
                 print(f"Error reading config file: {e}")
-
-                config.read_dict(DEFAULT_CONFIG)
+        elif os.path.exists(LEGACY_CONFIG_FILE):
+            # Carry settings over from the older INI format
+            parser = configparser.ConfigParser()
+            parser.read(LEGACY_CONFIG_FILE)
+            config = {section: dict(parser[section]) for section in parser.sections()}
 
         for section, options in DEFAULT_CONFIG.items():
-            if section not in config:
-                config[section] = {}
+            values = config.setdefault(section, {})
             for key, value in options.items():
-                if key not in config[section]:
-                    config[section][key] = value
+                values.setdefault(key, value)
+
+        if not os.path.exists(CONFIG_FILE):
+            try:
+                with open(CONFIG_FILE, "w") as configfile:
+                    json.dump(config, configfile, indent=2)
+            except Exception as e:
+                print(f"Error creating config file: {e}")
 
         return config
 
@@ -87,7 +90,7 @@ class SpotifyToYouTubeConverter(ctk.CTk):
 
         try:
             with open(CONFIG_FILE, "w") as configfile:
-                self.config.write(configfile)
+                json.dump(self.config, configfile, indent=2)
             print("Config saved successfully")
             return True
         except Exception as e:
@@ -12,7 +12,8 @@ import spotipy
 
 console = Console()
 
-CONFIG_FILE = "spotify_converter.cfg"
+CONFIG_FILE = "spotify_converter.json"
+LEGACY_CONFIG_FILE = "spotify_converter.cfg"
 DEFAULT_CONFIG = {
     "Spotify": {"client_id": "", "client_secret": ""},
     "Settings": {"output_path": str(Path.home() / "downloads")},
@@ -36,25 +37,29 @@ def log(message, level="info"):
 
 
 def load_config():
-    config = configparser.ConfigParser()
+    config = {}
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE) as f:
+            config = json.load(f)
+    elif os.path.exists(LEGACY_CONFIG_FILE):
+        # Carry settings over from the older INI format
+        parser = configparser.ConfigParser()
+        parser.read(LEGACY_CONFIG_FILE)
+        config = {section: dict(parser[section]) for section in parser.sections()}
+
+    for section, defaults in DEFAULT_CONFIG.items():
+        values = config.setdefault(section, {})
+        for key, val in defaults.items():
+            values.setdefault(key, val)
+
     if not os.path.exists(CONFIG_FILE):
-        config.read_dict(DEFAULT_CONFIG)
-        with open(CONFIG_FILE, "w") as f:
-            config.write(f)
-    else:
-        config.read(CONFIG_FILE)
-        for section in DEFAULT_CONFIG:
-            if section not in config:
-                config[section] = {}
-            for key, val in DEFAULT_CONFIG[section].items():
-                if key not in config[section]:
-                    config[section][key] = val
+        save_config(config)
     return config
 
 
 def save_config(config):
     with open(CONFIG_FILE, "w") as f:
-        config.write(f)
+        json.dump(config, f, indent=2)
 
 
 def sanitize_filename(name):
@@ -2,29 +2,70 @@ import os
 import re
 import sys
 import json
-import configparser
+import importlib.util
+import queue
+import shutil
 import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from rich.console import Console
-from rich.progress import (
-    Progress,
-    SpinnerColumn,
-    TextColumn,
-    BarColumn,
-    TaskProgressColumn,
-)
-from spotipy.oauth2 import SpotifyClientCredentials
-import spotipy
 
 console = Console()
+_console_lock = threading.Lock()
+_ydl_local = threading.local()
+_config_cache = None
+_config_dirty = False
 
-CONFIG_FILE = "spotify_converter.cfg"
+CONFIG_FILE = "spotify_converter.json"
+LEGACY_CONFIG_FILE = "spotify_converter.cfg"
 DEFAULT_CONFIG = {
     "Spotify": {"client_id": "", "client_secret": ""},
     "Settings": {"output_path": str(Path.home() / "Music" / "Spotify Downloads")},
-    "Download": {"audio_quality": "192K", "format": "mp3", "video_format": "mp4"},
+    "Download": {
+        "audio_quality": "192K",
+        "format": "mp3",
+        "video_format": "mp4",
+        "max_concurrency": "4",
+        "concurrent_fragments": "4",
+        "external_downloader": "aria2c",
+        "log_per_track": False,
+    },
 }
 
+_SANITIZE_RE = re.compile(r'[<>:"/\\|?*]')
+_URL_RE = re.compile(r"^https?://")
+_PLAYLIST_RE = re.compile(r"(?:playlist/|playlist:)([a-zA-Z0-9]+)")
+
+PLAYLIST_ITEM_FIELDS = "items(track(name,artists(name),external_ids(isrc))),total"
+PLAYLIST_PAGE_SIZE = 100
+# Upper bound on parallel page requests, to stay clear of Spotify's rate limit
+SPOTIFY_MAX_PARALLEL_REQUESTS = 8
+# Per-playlist sidecar mapping ISRC -> filename of tracks already downloaded
+ISRC_CACHE_FILE = ".isrc_cache.json"
+# Formats ffmpeg can embed a cover image into as an attached picture
+COVER_ART_FORMATS = {"mp3", "m4a", "flac"}
+# Prefix of yt-dlp's acodec for streams each format can hold without re-encoding
+FORMAT_CODECS = {
+    "mp3": "mp3",
+    "m4a": "mp4a",
+    "aac": "mp4a",
+    "opus": "opus",
+    "ogg": "vorbis",
+    "flac": "flac",
+}
+# ffmpeg -q:a values for yt-dlp VBR qualities 0 (best) and 10 (worst)
+VBR_QUALITY_RANGES = {
+    "mp3": (0, 10),
+    "ogg": (10, 0),
+    "m4a": (4, 0.1),
+    "aac": (4, 0.1),
+}
+# Split each file into parallel HTTP range requests when aria2c is available
+ARIA2C_ARGS = ["-x16", "-s16", "-k1M", "--file-allocation=none"]
+
 
 def log(message, level="info"):
     colors = {
@@ -39,38 +80,74 @@ def log(message, level="info"):
         "error": "[x]",
         "warning": "[!]",
     }
-    console.print(f"{icon.get(level, '[*]')} [bold {colors[level]}]{message}[/]")
+    # Playlist downloads log from worker threads; keep lines from interleaving
+    with _console_lock:
+        console.print(f"{icon.get(level, '[*]')} [bold {colors[level]}]{message}[/]")
+
+
+def _read_legacy_config():
+    """Read settings saved by older versions in INI format"""
+    import configparser
+
+    parser = configparser.ConfigParser()
+    parser.read(LEGACY_CONFIG_FILE)
+    return {section: dict(parser[section]) for section in parser.sections()}
 
 
 def load_config():
-    config = configparser.ConfigParser()
-    if not os.path.exists(CONFIG_FILE):
-        config.read_dict(DEFAULT_CONFIG)
-        with open(CONFIG_FILE, "w") as f:
-            config.write(f)
-        log(f"Created new config file: {CONFIG_FILE}", "info")
+    global _config_cache
+    if _config_cache is not None:
+        return _config_cache
+
+    config_path = Path(CONFIG_FILE)
+    if config_path.exists():
+        config = json.loads(config_path.read_text())
+    elif os.path.exists(LEGACY_CONFIG_FILE):
+        config = _read_legacy_config()
+        log(f"Migrated {LEGACY_CONFIG_FILE} to {CONFIG_FILE}", "info")
     else:
-        config.read(CONFIG_FILE)
-        for section in DEFAULT_CONFIG:
-            if section not in config:
-                config[section] = {}
-            for key, val in DEFAULT_CONFIG[section].items():
-                if key not in config[section]:
-                    config[section][key] = val
+        config = {}
+        log(f"Created new config file: {CONFIG_FILE}", "info")
+
+    for section, defaults in DEFAULT_CONFIG.items():
+        values = config.setdefault(section, {})
+        for key, val in defaults.items():
+            values.setdefault(key, val)
+
+    if not config_path.exists():
+        save_config(config)
+    _config_cache = config
     return config
 
 
 def save_config(config):
-    with open(CONFIG_FILE, "w") as f:
-        config.write(f)
+    global _config_cache, _config_dirty
+    Path(CONFIG_FILE).write_text(json.dumps(config, indent=2))
+    _config_cache = config
+    _config_dirty = False
+
+
+def mark_config_dirty():
+    """Record an unsaved settings change; menu() writes it out via flush_config"""
+    global _config_dirty
+    _config_dirty = True
+
+
+def flush_config(config):
+    if _config_dirty:
+        save_config(config)
 
 
 def sanitize_filename(name):
     """Remove invalid characters for Windows filenames"""
-    return re.sub(r'[<>:"/\\|?*]', "_", name)
+    return _SANITIZE_RE.sub("_", name)
 
 
 def initialize_spotify_client(config):
+    # Imported here so YouTube-only sessions skip loading spotipy entirely
+    import spotipy
+    from spotipy.oauth2 import SpotifyClientCredentials
+
     try:
         cid = config["Spotify"]["client_id"]
         secret = config["Spotify"]["client_secret"]
@@ -84,81 +161,480 @@ def initialize_spotify_client(config):
         return None
 
 
-def download_youtube(query, output_path, is_video=False, config=None):
-    if config is None:
-        config = load_config()
+class _QuietLogger:
+    """Discard yt-dlp output; failures are reported through DownloadError"""
 
-    output_template = os.path.join(output_path, "%(title)s.%(ext)s")
-    command = ["yt-dlp", "-o", output_template, "--no-warnings"]
+    def debug(self, msg):
+        pass
+
+    info = warning = error = debug
+
+
+@lru_cache(maxsize=None)
+def has_executable(name):
+    """Check whether name is on PATH, looking it up only once per run"""
+    return shutil.which(name) is not None
+
+
+@lru_cache(maxsize=None)
+def _note_missing_downloader(name):
+    """Mention once per run that the configured external downloader is absent"""
+    log(f"{name} not found - using yt-dlp's built-in downloader", "info")
+
+
+def positive_int_setting(config, key):
+    """Read a Download setting that must be a positive whole number"""
+    value = config["Download"][key]
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        number = 0
+    if number < 1:
+        raise ValueError(f"Download.{key} must be a positive number, got {value!r}")
+    return number
+
+
+def build_ydl_options(output_path, is_video, config):
+    """Translate download settings into YoutubeDL options"""
+    options = {
+        "outtmpl": os.path.join(output_path, "%(title)s.%(ext)s"),
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        # Fetch DASH/HLS fragments in parallel
+        "concurrent_fragment_downloads": positive_int_setting(
+            config, "concurrent_fragments"
+        ),
+    }
+
+    downloader = config["Download"].get("external_downloader", "")
+    if downloader and has_executable(downloader):
+        options["external_downloader"] = {"default": downloader}
+        if downloader == "aria2c":
+            options["external_downloader_args"] = {"aria2c": ARIA2C_ARGS}
+    elif downloader:
+        _note_missing_downloader(downloader)
 
     if is_video:
-        video_format = config["Download"]["video_format"]
-        command += [
-            "-f",
-            "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best",
-            "--merge-output-format",
-            video_format,
-        ]
-        if not re.match(r"^https?://", query):
-            query = f"ytsearch1:{query} official video"
+        options.update(
+            {
+                "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best",
+                "merge_output_format": config["Download"]["video_format"],
+            }
+        )
     else:
-        audio_format = config["Download"]["format"]
         audio_quality = config["Download"]["audio_quality"]
+        options.update(
+            {
+                "format": "bestaudio/best",
+                "writethumbnail": True,
+                "postprocessors": [
+                    {
+                        "key": "FFmpegExtractAudio",
+                        "preferredcodec": config["Download"]["format"],
+                        "preferredquality": audio_quality.rstrip("kK"),
+                    },
+                    {"key": "FFmpegMetadata", "add_metadata": True},
+                    {"key": "EmbedThumbnail", "already_have_thumbnail": False},
+                ],
+            }
+        )
+
+    return options
+
+
+def _report_progress(status):
+    """yt-dlp progress hook; forwards updates to this thread's listener, if any"""
+    on_progress = getattr(_ydl_local, "on_progress", None)
+    if on_progress:
+        on_progress(status)
+
+
+def _get_ydl(options):
+    """Return this thread's YoutubeDL for the given options, creating it once"""
+    # Imported here so a missing yt-dlp is reported by check_dependencies
+    from yt_dlp import YoutubeDL
+
+    instances = _ydl_local.__dict__.setdefault("instances", {})
+    key = json.dumps(options, sort_keys=True)
+    if key not in instances:
+        instances[key] = YoutubeDL(
+            {
+                **options,
+                "logger": _QuietLogger(),
+                "progress_hooks": [_report_progress],
+            }
+        )
+    return instances[key]
+
+
+def _search_query(query, is_video):
+    if _URL_RE.match(query):
+        return query
+    kind = "video" if is_video else "audio"
+    return f"ytsearch1:{query} official {kind}"
+
+
+def _run_ydl(options, query):
+    """Download a single query, logging the reason on failure"""
+    from yt_dlp.utils import DownloadError
+
+    try:
+        # YoutubeDL instances are not thread-safe, so each worker gets its own
+        return _get_ydl(options).download([query]) == 0
+    except DownloadError as e:
+        log(f"Download failed: {e}", "error")
+        return False
+    except Exception as e:
+        log(f"Download error: {e}", "error")
+        return False
+
+
+def download_youtube(query, output_path, is_video, config):
+    from rich.progress import (
+        Progress,
+        SpinnerColumn,
+        TextColumn,
+        BarColumn,
+        TaskProgressColumn,
+    )
+
+    try:
+        options = build_ydl_options(output_path, is_video, config)
+    except ValueError as e:
+        log(f"Invalid download settings: {e}", "error")
+        return False
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[bold magenta]Downloading...[/]"),
+        BarColumn(),
+        TaskProgressColumn(),
+        console=console,
+    ) as progress:
+        task = progress.add_task("download", total=100)
+
+        def on_progress(status):
+            total = status.get("total_bytes") or status.get("total_bytes_estimate")
+            if status["status"] == "downloading" and total:
+                progress.update(
+                    task, completed=status["downloaded_bytes"] * 100 / total
+                )
+
+        _ydl_local.on_progress = on_progress
+        try:
+            success = _run_ydl(options, _search_query(query, is_video))
+        finally:
+            _ydl_local.on_progress = None
+        progress.update(task, completed=100)
+    return success
+
+
+def build_fetch_options(work_dir, config):
+    """YoutubeDL options that only fetch the best audio stream and its thumbnail
+    into work_dir, leaving conversion to transcode_audio"""
+    options = build_ydl_options(work_dir, False, config)
+    options["outtmpl"] = os.path.join(work_dir, "%(id)s.%(ext)s")
+    del options["postprocessors"]
+    return options
+
+
+def _fetch_audio(options, query):
+    """Download the raw audio stream for query.
+
+    Returns (path, acodec, thumbnail path or None), or None on failure.
+    """
+    from yt_dlp.utils import DownloadError
+
+    try:
+        info = _get_ydl(options).extract_info(
+            _search_query(query, False), download=True
+        )
+        if "entries" in info:
+            if not info["entries"]:
+                log(f"No results for: {query}", "error")
+                return None
+            info = info["entries"][0]
+        thumbnail = next(
+            (
+                thumb["filepath"]
+                for thumb in reversed(info.get("thumbnails") or [])
+                if thumb.get("filepath")
+            ),
+            None,
+        )
+        path = info["requested_downloads"][0]["filepath"]
+        return path, info.get("acodec") or "", thumbnail
+    except DownloadError as e:
+        log(f"Download failed: {e}", "error")
+        return None
+    except Exception as e:
+        log(f"Download error: {e}", "error")
+        return None
+
+
+def _audio_quality_args(audio_quality, audio_format):
+    """ffmpeg arguments for a yt-dlp style quality: a bitrate such as 192K,
+    or a VBR level from 0 (best) to 10 (worst)"""
+    quality = str(audio_quality).strip().rstrip("kK")
+    try:
+        value = float(quality)
+    except ValueError:
+        return []
+    if value > 10:
+        return ["-b:a", f"{quality}k"]
+
+    limits = VBR_QUALITY_RANGES.get(audio_format)
+    if not limits:
+        return []
+    best, worst = limits
+    return ["-q:a", f"{best + (worst - best) * value / 10:g}"]
+
+
+def transcode_audio(source, target, config, tags=None, thumbnail=None, acodec=""):
+    """Encode a downloaded stream into target's format with ffmpeg.
+
+    The stream is copied as-is when acodec already suits the target format,
+    and thumbnail is embedded as cover art where the format supports it.
+    """
+    audio_format = os.path.splitext(target)[1][1:].lower()
+    # Encode next to the source and move into place only once ffmpeg succeeds,
+    # so a failed or interrupted run never leaves a partial file at target
+    temp_target = f"{os.path.splitext(source)[0]}.out.{audio_format}"
+    command = ["ffmpeg", "-y", "-loglevel", "error", "-i", source]
+
+    if thumbnail and audio_format in COVER_ART_FORMATS:
         command += [
-            "-x",
-            "--audio-format",
-            audio_format,
-            "--audio-quality",
-            audio_quality,
-            "--embed-thumbnail",
-            "--add-metadata",
-            "--embed-metadata",
-            "--prefer-ffmpeg",
+            "-i",
+            thumbnail,
+            "-map",
+            "0:a:0",
+            "-map",
+            "1:v:0",
+            "-c:v",
+            "mjpeg",
+            "-disposition:v",
+            "attached_pic",
         ]
-        if not re.match(r"^https?://", query):
-            query = f"ytsearch1:{query} official audio"
+    else:
+        command += ["-map", "0:a:0"]
 
-    command.append(query)
+    codec = FORMAT_CODECS.get(audio_format)
+    if codec and acodec.startswith(codec):
+        command += ["-c:a", "copy"]
+    else:
+        command += _audio_quality_args(
+            config["Download"]["audio_quality"], audio_format
+        )
+
+    if audio_format == "mp3":
+        command += ["-id3v2_version", "3"]
+    for key, value in (tags or {}).items():
+        command += ["-metadata", f"{key}={value}"]
+    command.append(temp_target)
 
     try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[bold magenta]Downloading...[/]"),
-            BarColumn(),
-            TaskProgressColumn(),
-            console=console,
-        ) as progress:
-            task = progress.add_task("download", total=None)
-            result = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=(
-                    subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
-                ),
-            )
-            progress.update(task, completed=1)
-
-        if result.returncode == 0:
-            return True
-        else:
-            log(f"Download failed: {result.stderr}", "error")
+        result = subprocess.run(
+            command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            creationflags=(
+                subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+            ),
+        )
+        if result.returncode != 0:
+            log(f"Conversion failed: {result.stderr.strip()}", "error")
             return False
 
+        # ffmpeg's mp4 muxer has no atom for ISRC and drops it
+        if audio_format in ("m4a", "mp4") and "ISRC" in (tags or {}):
+            tag_mp4_isrc(temp_target, tags["ISRC"])
+        os.replace(temp_target, target)
+        return True
     except Exception as e:
-        log(f"Download error: {e}", "error")
+        log(f"Conversion error: {e}", "error")
         return False
+    finally:
+        try:
+            os.remove(temp_target)
+        except OSError:
+            pass
+
+
+def tag_mp4_isrc(path, isrc):
+    """Store ISRC in an m4a file's iTunes freeform atom, if mutagen is installed"""
+    try:
+        from mutagen.mp4 import MP4, MP4FreeForm
+    except ImportError:
+        return
+
+    try:
+        audio = MP4(path)
+        audio["----:com.apple.iTunes:ISRC"] = [MP4FreeForm(isrc.encode())]
+        audio.save()
+    except Exception as e:
+        log(f"Could not tag ISRC: {e}", "warning")
+
+
+def download_audio_pipeline(items, options, net_workers, config, on_done, stop=None):
+    """Download and convert (query, filename, tags) items in two stages.
+
+    net_workers network workers fetch raw streams using options (from
+    build_fetch_options) and queue them for a separate pool of ffmpeg workers,
+    so converting one track overlaps with downloading the next.
+    on_done(index, success) is called from the worker threads once per item.
+    Once stop (a threading.Event) is set, items not yet started are skipped
+    and never reported, and the workers exit after their current track.
+    The first exception raised by a worker is re-raised once all have stopped.
+    """
+    stop = stop or threading.Event()
+    cpu_workers = os.cpu_count() or 1
+    net_q = queue.Queue(maxsize=2 * net_workers)
+    cpu_q = queue.Queue()
+
+    def feed():
+        try:
+            for index, item in enumerate(items):
+                if stop.is_set():
+                    break
+                net_q.put((index, item))
+        finally:
+            for _ in range(net_workers):
+                net_q.put(None)
+
+    def fetch():
+        while True:
+            job = net_q.get()
+            if job is None:
+                return
+            if stop.is_set():
+                # Keep draining so feed() is never left blocked on a full queue
+                continue
+            index, (query, _, _) = job
+            fetched = _fetch_audio(options, query)
+            if fetched:
+                cpu_q.put((job, fetched))
+            else:
+                on_done(index, False)
+
+    def convert():
+        while True:
+            work = cpu_q.get()
+            if work is None:
+                return
+            (index, (_, filename, tags)), (source, acodec, thumbnail) = work
+            try:
+                if stop.is_set():
+                    continue
+                success = transcode_audio(
+                    source, filename, config, tags, thumbnail, acodec
+                )
+            finally:
+                for path in (source, thumbnail):
+                    try:
+                        if path:
+                            os.remove(path)
+                    except OSError:
+                        pass
+            on_done(index, success)
+
+    # ffmpeg runs in its own process, so plain threads keep every core busy
+    with ThreadPoolExecutor(max_workers=cpu_workers) as cpu_pool:
+        futures = [cpu_pool.submit(convert) for _ in range(cpu_workers)]
+        with ThreadPoolExecutor(max_workers=net_workers + 1) as net_pool:
+            futures.append(net_pool.submit(feed))
+            futures += [net_pool.submit(fetch) for _ in range(net_workers)]
+        for _ in range(cpu_workers):
+            cpu_q.put(None)
+
+    for future in futures:
+        future.result()
+
+
+def fetch_playlist_tracks(spotify, playlist_id):
+    """Fetch every playlist item, requesting all pages after the first at once"""
+
+    def fetch_page(offset):
+        # Only request the fields we use; full track objects are mostly album data
+        return spotify.playlist_items(
+            playlist_id,
+            fields=PLAYLIST_ITEM_FIELDS,
+            limit=PLAYLIST_PAGE_SIZE,
+            offset=offset,
+            additional_types=("track",),
+        )
+
+    first_page = fetch_page(0)
+    tracks = first_page["items"]
+    offsets = range(PLAYLIST_PAGE_SIZE, first_page["total"], PLAYLIST_PAGE_SIZE)
+    if offsets:
+        max_workers = min(len(offsets), SPOTIFY_MAX_PARALLEL_REQUESTS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for page in executor.map(fetch_page, offsets):
+                tracks.extend(page["items"])
+    return tracks
+
+
+def load_isrc_cache(folder):
+    """Map ISRC to filename for tracks already downloaded into folder.
+
+    Falls back to reading ISRC tags from the files themselves when the sidecar
+    is missing and mutagen is installed.
+    """
+    try:
+        cache = json.loads((Path(folder) / ISRC_CACHE_FILE).read_text())
+        if isinstance(cache, dict):
+            return cache
+    except (OSError, ValueError):
+        pass
+
+    try:
+        import mutagen
+        from mutagen.easymp4 import EasyMP4Tags
+    except ImportError:
+        return {}
+
+    # Matches the freeform atom written by tag_mp4_isrc
+    EasyMP4Tags.RegisterFreeformKey("isrc", "ISRC")
+
+    cache = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            try:
+                audio = mutagen.File(entry.path, easy=True)
+            except Exception:
+                continue
+            isrc = audio.get("isrc") if audio else None
+            if isrc:
+                cache[isrc[0]] = entry.name
+    return cache
+
+
+def save_isrc_cache(folder, cache):
+    (Path(folder) / ISRC_CACHE_FILE).write_text(json.dumps(cache, indent=2))
 
 
 def convert_spotify_playlist(spotify, url, output_dir, config):
-    match = re.search(r"(?:playlist/|playlist:)([a-zA-Z0-9]+)", url)
+    from rich.progress import (
+        Progress,
+        SpinnerColumn,
+        TextColumn,
+        BarColumn,
+        TaskProgressColumn,
+    )
+    from rich.markup import escape
+
+    match = _PLAYLIST_RE.search(url)
     if not match:
         log("Invalid Spotify playlist URL", "error")
         return
 
     try:
-        playlist = spotify.playlist(match.group(1))
+        playlist_id = match.group(1)
+        playlist = spotify.playlist(playlist_id, fields="name")
         name = sanitize_filename(playlist["name"])
         full_path = os.path.join(output_dir, name)
         os.makedirs(full_path, exist_ok=True)
@@ -166,12 +642,7 @@ def convert_spotify_playlist(spotify, url, output_dir, config):
         log(f"Playlist: {name}", "info")
         log(f"Output directory: {full_path}", "info")
 
-        tracks = playlist["tracks"]["items"]
-
-        # Handle pagination for large playlists
-        while playlist["tracks"]["next"]:
-            playlist["tracks"] = spotify.next(playlist["tracks"])
-            tracks.extend(playlist["tracks"]["items"])
+        tracks = fetch_playlist_tracks(spotify, playlist_id)
 
         log(f"Found {len(tracks)} tracks in playlist", "info")
 
@@ -181,41 +652,163 @@ def convert_spotify_playlist(spotify, url, output_dir, config):
 
         with Progress(
             SpinnerColumn(),
-            TextColumn("[bold magenta]Downloading tracks...[/]"),
+            TextColumn("[bold magenta]{task.description}[/]"),
             BarColumn(),
             TaskProgressColumn(),
             console=console,
         ) as progress:
-            task = progress.add_task("playlist", total=len(tracks))
-
-            for i, item in enumerate(tracks, 1):
-                track = item["track"]
-                if not track:  # Skip null tracks
-                    continue
-
-                title = track["name"]
-                artist = ", ".join([a["name"] for a in track["artists"]])
-                query = f"{artist} - {title}"
-                filename = os.path.join(full_path, sanitize_filename(f"{query}.mp3"))
-
-                if os.path.exists(filename):
-                    log(f"[{i}/{len(tracks)}] Skipping (exists): {query}", "warning")
+            task = progress.add_task("Downloading tracks...", total=len(tracks))
+            # Per-track lines are opt-in; the progress bar already names each track
+            # Accept a JSON bool or the string form left by hand edits
+            verbose = str(config["Download"]["log_per_track"]).lower() == "true"
+
+            # One directory listing instead of a stat() per track
+            with os.scandir(full_path) as entries:
+                existing = {entry.name for entry in entries}
+            isrc_cache = load_isrc_cache(full_path)
+
+            # Build every query and target filename up front; null tracks
+            # (removed from Spotify) are dropped and counted as done
+            numbered = [
+                (i, item["track"])
+                for i, item in enumerate(tracks, 1)
+                if item["track"]
+            ]
+            artists = [
+                ", ".join(a["name"] for a in track["artists"]) for _, track in numbered
+            ]
+            queries = [
+                f"{artist} - {track['name']}"
+                for artist, (_, track) in zip(artists, numbered)
+            ]
+            audio_format = config["Download"]["format"]
+            # ID3 stores ISRC in the TSRC frame; other containers use ISRC
+            isrc_tag = "TSRC" if audio_format == "mp3" else "ISRC"
+            # full_path is fixed for the playlist, so join it once up front
+            base = full_path + os.sep
+            suffix = f".{audio_format}"
+            filenames = [
+                base + _SANITIZE_RE.sub("_", query) + suffix for query in queries
+            ]
+            progress.advance(task, len(tracks) - len(numbered))
+
+            pending = []
+            # Repeats within the playlist would share a temp file and target
+            seen_filenames = set()
+            seen_isrcs = set()
+            for (i, track), artist, query, filename in zip(
+                numbered, artists, queries, filenames
+            ):
+                # A known ISRC catches tracks saved under a different name
+                isrc = (track.get("external_ids") or {}).get("isrc")
+                if filename in seen_filenames or (isrc and isrc in seen_isrcs):
+                    if verbose:
+                        log(
+                            f"[{i}/{len(tracks)}] Skipping (duplicate): {query}",
+                            "warning",
+                        )
                     skipped_downloads += 1
                     progress.advance(task)
                     continue
-
-                log(f"[{i}/{len(tracks)}] Downloading: {query}", "info")
-                success = download_youtube(
-                    query, full_path, is_video=False, config=config
-                )
-                if success:
-                    log(f"[{i}/{len(tracks)}] ✓ Downloaded: {query}", "success")
-                    successful_downloads += 1
+                seen_filenames.add(filename)
+                if isrc:
+                    seen_isrcs.add(isrc)
+
+                if (
+                    os.path.basename(filename) in existing
+                    or isrc_cache.get(isrc) in existing
+                ):
+                    if verbose:
+                        log(
+                            f"[{i}/{len(tracks)}] Skipping (exists): {query}",
+                            "warning",
+                        )
+                    if isrc:
+                        isrc_cache.setdefault(isrc, os.path.basename(filename))
+                    skipped_downloads += 1
+                    progress.advance(task)
                 else:
-                    log(f"[{i}/{len(tracks)}] ✗ Failed: {query}", "error")
-                    failed_downloads += 1
-
-                progress.advance(task)
+                    tags = {"title": track["name"], "artist": artist}
+                    if isrc:
+                        tags[isrc_tag] = isrc
+                    pending.append((i, query, filename, tags))
+
+            net_workers = positive_int_setting(config, "max_concurrency")
+            finished = queue.Queue()
+            stop = threading.Event()
+            if verbose:
+                for i, query, _, _ in pending:
+                    log(f"[{i}/{len(tracks)}] Downloading: {query}", "info")
+
+            def on_done(index, success):
+                finished.put((pending[index], success))
+
+            # Raw streams are staged in a hidden folder and removed once converted
+            with tempfile.TemporaryDirectory(
+                prefix=".download-", dir=full_path
+            ) as work_dir:
+                fetch_options = build_fetch_options(work_dir, config)
+
+                def run_pipeline():
+                    try:
+                        download_audio_pipeline(
+                            [item[1:] for item in pending],
+                            fetch_options,
+                            net_workers,
+                            config,
+                            on_done,
+                            stop,
+                        )
+                    except Exception as e:
+                        log(f"Download pipeline error: {e}", "error")
+                    finally:
+                        # Wake the loop below even if some items never reported
+                        finished.put(None)
+
+                pipeline = threading.Thread(target=run_pipeline, daemon=True)
+                pipeline.start()
+
+                reported = 0
+                try:
+                    while True:
+                        result = finished.get()
+                        if result is None:
+                            break
+                        (i, query, filename, tags), success = result
+                        reported += 1
+                        if success:
+                            existing.add(os.path.basename(filename))
+                            if isrc_tag in tags:
+                                isrc_cache[tags[isrc_tag]] = os.path.basename(filename)
+                            if verbose:
+                                log(
+                                    f"[{i}/{len(tracks)}] ✓ Downloaded: {query}",
+                                    "success",
+                                )
+                            successful_downloads += 1
+                        else:
+                            if verbose:
+                                log(f"[{i}/{len(tracks)}] ✗ Failed: {query}", "error")
+                            failed_downloads += 1
+
+                        progress.update(
+                            task,
+                            advance=1,
+                            description=f"{i}/{len(tracks)} {escape(query[:40])}",
+                        )
+                except BaseException:
+                    # On Ctrl-C, let the in-flight tracks finish before
+                    # work_dir is removed instead of draining the whole playlist
+                    stop.set()
+                    pipeline.join()
+                    raise
+
+                pipeline.join()
+                # Anything the pipeline never reported on counts as failed
+                failed_downloads += len(pending) - reported
+                progress.advance(task, len(pending) - reported)
+
+            save_isrc_cache(full_path, isrc_cache)
 
         # Summary
         log(
@@ -258,7 +851,7 @@ def configure_spotify_api(config):
     if cid and secret:
         config["Spotify"]["client_id"] = cid
         config["Spotify"]["client_secret"] = secret
-        save_config(config)
+        mark_config_dirty()
         log("Spotify credentials saved successfully!", "success")
     else:
         log("Invalid credentials provided", "error")
@@ -279,7 +872,7 @@ def set_output_directory(config):
     try:
         Path(path).mkdir(parents=True, exist_ok=True)
         config["Settings"]["output_path"] = path
-        save_config(config)
+        mark_config_dirty()
         log(f"Output path set to: {path}", "success")
     except Exception as e:
         log(f"Invalid directory: {e}", "error")
@@ -291,64 +884,78 @@ def configure_download_settings(config):
     current_quality = config["Download"]["audio_quality"]
     current_format = config["Download"]["format"]
     current_video_format = config["Download"]["video_format"]
+    current_fragments = config["Download"]["concurrent_fragments"]
+    current_log_per_track = str(config["Download"]["log_per_track"]).lower() == "true"
 
     console.print(f"1. Audio Quality (current: {current_quality})")
     console.print(f"2. Audio Format (current: {current_format})")
     console.print(f"3. Video Format (current: {current_video_format})")
+    console.print(f"4. Concurrent Fragments (current: {current_fragments})")
+    console.print(f"5. Log Every Playlist Track (current: {current_log_per_track})")
 
-    choice = input("\nChoose setting to change (1-3) or Enter to cancel: ").strip()
+    choice = input("\nChoose setting to change (1-5) or Enter to cancel: ").strip()
 
     if choice == "1":
         quality = input("Enter audio quality (e.g., 128K, 192K, 320K): ").strip()
         if quality:
             config["Download"]["audio_quality"] = quality
-            save_config(config)
+            mark_config_dirty()
             log(f"Audio quality set to: {quality}", "success")
 
     elif choice == "2":
         format_choice = input("Enter audio format (mp3, m4a, flac, etc.): ").strip()
         if format_choice:
             config["Download"]["format"] = format_choice
-            save_config(config)
+            mark_config_dirty()
             log(f"Audio format set to: {format_choice}", "success")
 
     elif choice == "3":
         video_format = input("Enter video format (mp4, mkv, avi, etc.): ").strip()
         if video_format:
             config["Download"]["video_format"] = video_format
-            save_config(config)
+            mark_config_dirty()
             log(f"Video format set to: {video_format}", "success")
 
+    elif choice == "4":
+        fragments = input("Enter concurrent fragments (e.g., 1, 4, 8): ").strip()
+        if fragments.isdigit() and int(fragments) > 0:
+            config["Download"]["concurrent_fragments"] = fragments
+            mark_config_dirty()
+            log(f"Concurrent fragments set to: {fragments}", "success")
+        elif fragments:
+            log("Concurrent fragments must be a positive number", "error")
+
+    elif choice == "5":
+        config["Download"]["log_per_track"] = not current_log_per_track
+        mark_config_dirty()
+        log(f"Log every playlist track set to: {not current_log_per_track}", "success")
+
 
 def check_dependencies():
     """Check if required dependencies are installed"""
     missing_deps = []
 
     # Check yt-dlp
-    try:
-        subprocess.run(["yt-dlp", "--version"], check=True, capture_output=True)
-    except (FileNotFoundError, subprocess.CalledProcessError):
+    if importlib.util.find_spec("yt_dlp") is None:
         missing_deps.append("yt-dlp")
 
     # Check ffmpeg (optional but recommended)
-    try:
-        subprocess.run(["ffmpeg", "-version"], check=True, capture_output=True)
-    except (FileNotFoundError, subprocess.CalledProcessError):
+    if not has_executable("ffmpeg"):
         log("FFmpeg not found - some features may not work properly", "warning")
 
-    # Check spotipy
-    try:
-        import spotipy
-    except ImportError:
+    # Check mutagen (optional, rebuilds a lost ISRC cache from file tags)
+    if importlib.util.find_spec("mutagen") is None:
+        log("mutagen not found - a lost .isrc_cache.json cannot be rebuilt", "info")
+
+    # Check spotipy without importing it; it is loaded on first Spotify use
+    if importlib.util.find_spec("spotipy") is None:
         missing_deps.append("spotipy")
 
     if missing_deps:
         console.print("\n[red][x] Missing dependencies:[/]")
         for dep in missing_deps:
             if dep == "yt-dlp":
-                console.print(
-                    "    • yt-dlp: Download and install from https://github.com/yt-dlp/yt-dlp"
-                )
+                console.print("    • yt-dlp: Run: pip install yt-dlp")
             elif dep == "spotipy":
                 console.print("    • spotipy: Run: pip install spotipy")
         return False
@@ -400,6 +1007,8 @@ def menu():
         else:
             log("Invalid choice. Please try again.", "warning")
 
+        flush_config(config)
+
 
 if __name__ == "__main__":
     if sys.platform == "win32":